@@ -3,12 +3,15 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parents[1]
 DATA_DIR = BASE_DIR / "data"
 ARTIFACTS_DIR = BASE_DIR / "artifacts"
+CACHE_DIR = BASE_DIR / "cache"
+TEXT_EMBEDDING_STORE_DIR = CACHE_DIR / "text_embeddings"
 
 TEXT_MODEL_NAME_PRIMARY = "intfloat/e5-small-v2"
 TEXT_MODEL_NAME_FALLBACK = "sentence-transformers/all-MiniLM-L6-v2"
 TABULAR_PCA_COMPONENTS = 16
 TOPK_DEFAULT = 20
+STREAM_BATCH_SIZE = 1024
 
-for d in [DATA_DIR, ARTIFACTS_DIR]:
+for d in [DATA_DIR, ARTIFACTS_DIR, CACHE_DIR]:
     d.mkdir(parents=True, exist_ok=True)
 
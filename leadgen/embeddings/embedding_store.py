@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import contextlib
+import fcntl
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+
+_KEY_DTYPE = np.dtype("S40")  # hex sha1; raw digests would lose trailing NULs
+_UNSAFE_RE = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def content_hash(text: str) -> bytes:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest().encode("ascii")
+
+
+def model_fingerprint(path: Path) -> str:
+    """Short hash of every file under a local model directory.
+
+    Folded into the model ID so replacing the weights at the same path starts
+    a new store instead of reusing vectors from the old weights.
+    """
+    digest = hashlib.sha1()
+    root = Path(path)
+    for file in sorted(p for p in root.rglob("*") if p.is_file()):
+        digest.update(f"{file.relative_to(root).as_posix()}\0{file.stat().st_size}\0".encode("utf-8"))
+        with file.open("rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+class TextEmbeddingStore:
+    """Append-only, memory-mapped text embeddings keyed by content hash.
+
+    One directory per model ID holds ``vectors.f32`` (row-major float32),
+    ``keys.bin`` (one hex sha1 of the text per row) and ``meta.json``. The row count in
+    ``meta.json`` is written last, so rows from an interrupted append are
+    ignored and overwritten on the next one. Appends hold an exclusive lock on
+    ``.lock`` and re-read ``meta.json`` first, so concurrent builds don't
+    overwrite each other's rows.
+    """
+
+    def __init__(self, root: Path, model_id: str) -> None:
+        self.model_id = model_id
+        self.dir = Path(root) / _UNSAFE_RE.sub("_", model_id)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.dim: int | None = None
+        self.count = 0
+        self._rows: Dict[bytes, int] = {}
+        self._reload()
+
+    def _reload(self) -> None:
+        meta_file = self.dir / "meta.json"
+        if not meta_file.exists():
+            return
+        meta = json.loads(meta_file.read_text())
+        if meta["model_id"] != self.model_id:
+            raise ValueError(f"Store at {self.dir} belongs to model {meta['model_id']!r}, not {self.model_id!r}")
+        count = int(meta["count"])
+        if count == self.count:
+            return
+        self.dim = int(meta["dim"])
+        keys = np.fromfile(self.dir / "keys.bin", dtype=_KEY_DTYPE, count=count - self.count, offset=self.count * _KEY_DTYPE.itemsize)
+        self._rows.update((k, self.count + i) for i, k in enumerate(keys.tolist()))
+        self.count = count
+
+    @contextlib.contextmanager
+    def _locked(self) -> Iterator[None]:
+        with open(self.dir / ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self._reload()
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, key: bytes) -> bool:
+        return key in self._rows
+
+    def vectors(self) -> np.ndarray:
+        if self.count == 0:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        return np.memmap(self.dir / "vectors.f32", dtype=np.float32, mode="r", shape=(self.count, self.dim))
+
+    def get(self, keys: Sequence[bytes]) -> np.ndarray:
+        rows = np.fromiter((self._rows[k] for k in keys), dtype=np.int64, count=len(keys))
+        return np.asarray(self.vectors()[rows], dtype=np.float32)
+
+    def append(self, keys: Sequence[bytes], E: np.ndarray) -> None:
+        E = np.ascontiguousarray(E, dtype=np.float32)
+        if E.ndim != 2 or E.shape[0] != len(keys):
+            raise ValueError(f"Expected {len(keys)} embedding rows, got shape {E.shape}")
+        with self._locked():
+            self._append(keys, E)
+
+    def _append(self, keys: Sequence[bytes], E: np.ndarray) -> None:
+        # Caller holds the lock; skip rows another writer added in the meantime
+        new = [i for i, k in enumerate(keys) if k not in self._rows]
+        keys, E = [keys[i] for i in new], E[new]
+        if len(keys) == 0:
+            return
+        if self.dim is None:
+            self.dim = int(E.shape[1])
+        elif E.shape[1] != self.dim:
+            raise ValueError(f"Embedding dim {E.shape[1]} does not match store dim {self.dim}")
+
+        _write_at(self.dir / "vectors.f32", self.count * self.dim * 4, E.tobytes())
+        _write_at(self.dir / "keys.bin", self.count * _KEY_DTYPE.itemsize, np.asarray(keys, dtype=_KEY_DTYPE).tobytes())
+        for i, k in enumerate(keys):
+            self._rows[k] = self.count + i
+        self.count += len(keys)
+        meta = {"model_id": self.model_id, "dim": self.dim, "count": self.count}
+        tmp = self.dir / "meta.json.tmp"
+        tmp.write_text(json.dumps(meta, indent=2))
+        tmp.replace(self.dir / "meta.json")
+
+    def encode(self, texts: Sequence[str], text_model) -> Tuple[np.ndarray, Dict[str, int]]:
+        """Embed ``texts``, encoding only blobs not already in the store.
+
+        Duplicate texts within the call are encoded once. Returns the
+        embeddings in input order and counts of rows, unique blobs, unique
+        blobs already in the store (``cached``) and newly encoded blobs.
+        """
+        positions: Dict[bytes, int] = {}
+        unique_texts: List[str] = []
+        inverse = np.empty(len(texts), dtype=np.int64)
+        for i, text in enumerate(texts):
+            key = content_hash(text)
+            j = positions.get(key)
+            if j is None:
+                j = positions[key] = len(unique_texts)
+                unique_texts.append(text)
+            inverse[i] = j
+        unique_keys = list(positions)
+
+        with self._locked():
+            missing = [j for j, k in enumerate(unique_keys) if k not in self._rows]
+            if missing:
+                E_new = np.ascontiguousarray(text_model.encode([unique_texts[j] for j in missing]), dtype=np.float32)
+                self._append([unique_keys[j] for j in missing], E_new)
+
+        stats = {
+            "rows": len(texts),
+            "unique": len(unique_keys),
+            "cached": len(unique_keys) - len(missing),
+            "encoded": len(missing),
+        }
+        if not unique_keys:
+            return np.zeros((0, self.dim or 0), dtype=np.float32), stats
+        return self.get(unique_keys)[inverse], stats
+
+
+def _write_at(path: Path, offset: int, data: bytes) -> None:
+    # Drop any tail left behind by an interrupted append before writing
+    path.touch(exist_ok=True)
+    with open(path, "r+b") as f:
+        f.truncate(offset)
+        f.seek(offset)
+        f.write(data)
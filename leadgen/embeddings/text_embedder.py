@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from pathlib import Path
 from typing import Iterable, List
 
 import numpy as np
@@ -7,6 +8,28 @@ from sentence_transformers import SentenceTransformer
 from sklearn.feature_extraction.text import HashingVectorizer
 
 from leadgen.config import TEXT_MODEL_NAME_PRIMARY, TEXT_MODEL_NAME_FALLBACK
+from leadgen.embeddings.embedding_store import model_fingerprint
+
+
+def _model_id(name: str) -> str:
+    """Model name plus a fingerprint of the weights it resolved to.
+
+    Local directories are hashed; hub models use the cached snapshot's
+    commit hash. Without either, the bare name is returned.
+    """
+    if Path(name).is_dir():
+        return f"{name}@{model_fingerprint(Path(name))}"
+    try:
+        from huggingface_hub import try_to_load_from_cache
+
+        repo_id = name if "/" in name else f"sentence-transformers/{name}"
+        cached = try_to_load_from_cache(repo_id, "config.json")
+    except Exception:
+        cached = None
+    if isinstance(cached, str):
+        # .../snapshots/<commit>/config.json
+        return f"{name}@{Path(cached).parent.name[:12]}"
+    return name
 
 
 class TextEmbedder:
@@ -15,12 +38,15 @@ class TextEmbedder:
         self._fallback = False
         try:
             self.model = SentenceTransformer(name)
+            self.model_id = _model_id(name)
         except Exception:
             try:
                 self.model = SentenceTransformer(TEXT_MODEL_NAME_FALLBACK)
+                self.model_id = _model_id(TEXT_MODEL_NAME_FALLBACK)
             except Exception:
                 # Offline fallback: hashing vectorizer
                 self._fallback = True
+                self.model_id = f"hashing-{hashing_dim}"
                 self.vectorizer = HashingVectorizer(n_features=hashing_dim, norm=None, alternate_sign=False)
 
     def encode(self, texts: Iterable[str]) -> np.ndarray:
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+NEIGHBOR_ATTR_COLS = ["industry", "job_title", "country"]
+MISSING_CUSTOMER_ID = -1
+
+
+def write_neighbor_store(
+    df: pd.DataFrame,
+    high_mask: np.ndarray,
+    out_dir: Path,
+    attr_cols: Sequence[str] = NEIGHBOR_ATTR_COLS,
+) -> None:
+    """Write per-row neighbor metadata as fixed-width NumPy columns.
+
+    Row ``i`` of every column describes row ``i`` of the "all" FAISS index;
+    ``high_rows`` maps rows of the "high" index back to those row IDs.
+    String attributes are stored as int32 codes into a per-column vocabulary;
+    null customer IDs are stored as ``MISSING_CUSTOMER_ID``. Raises
+    ``ValueError`` if ``customer_id`` holds non-integer values.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if "customer_id" in df.columns:
+        customer_id = _customer_ids(df["customer_id"])
+    else:
+        customer_id = np.arange(len(df), dtype=np.int64)
+    np.save(out_dir / "customer_id.npy", customer_id)
+    np.save(out_dir / "is_high_value.npy", np.asarray(high_mask, dtype=bool))
+    np.save(out_dir / "high_rows.npy", np.flatnonzero(high_mask).astype(np.int64))
+
+    vocabs: Dict[str, List[str]] = {}
+    for col in attr_cols:
+        series = df[col] if col in df.columns else pd.Series([""] * len(df))
+        codes, uniques = pd.factorize(series.fillna("").astype(str))
+        np.save(out_dir / f"{col}.codes.npy", codes.astype(np.int32))
+        vocabs[col] = [str(u) for u in uniques]
+
+    meta = {"n_rows": int(len(df)), "attr_cols": list(attr_cols), "vocabs": vocabs}
+    (out_dir / "meta.json").write_text(json.dumps(meta))
+
+
+def _customer_ids(series: pd.Series) -> np.ndarray:
+    # Convert via nullable Int64 rather than float64 so large IDs stay exact
+    if pd.api.types.is_bool_dtype(series.dtype):
+        raise ValueError("customer_id must hold integers or nulls, got a boolean column")
+    try:
+        ids = pd.array(series.tolist() if series.dtype == object else series, dtype="Int64")
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f"customer_id must hold integers or nulls: {exc}") from exc
+    return ids.fillna(MISSING_CUSTOMER_ID).to_numpy(dtype=np.int64)
+
+
+class NeighborStore:
+    """Read-only, memory-mapped view over the columns written by ``write_neighbor_store``.
+
+    Lookups touch only the ``k`` requested rows, so serving needs neither the
+    CRM DataFrame nor pandas.
+    """
+
+    def __init__(self, path: Path) -> None:
+        meta = json.loads((path / "meta.json").read_text())
+        self.n_rows = int(meta["n_rows"])
+        self.attr_cols: List[str] = meta["attr_cols"]
+        self.vocabs: Dict[str, List[str]] = meta["vocabs"]
+        self._vocab_index = {col: {v: i for i, v in enumerate(vocab)} for col, vocab in self.vocabs.items()}
+        self.customer_id = np.load(path / "customer_id.npy", mmap_mode="r")
+        self.is_high_value = np.load(path / "is_high_value.npy", mmap_mode="r")
+        self.high_rows = np.load(path / "high_rows.npy", mmap_mode="r")
+        self.codes = {col: np.load(path / f"{col}.codes.npy", mmap_mode="r") for col in self.attr_cols}
+        columns = [self.customer_id, self.is_high_value, *self.codes.values()]
+        if any(len(c) != self.n_rows for c in columns):
+            raise ValueError(f"Neighbor store at {path} is incomplete: column lengths differ from n_rows={self.n_rows}")
+
+    def matches(self, n_all: int, n_high: int) -> bool:
+        """Whether this store describes indices with ``n_all``/``n_high`` rows."""
+        return self.n_rows == n_all and len(self.high_rows) == n_high
+
+    def describe(
+        self,
+        ids: Sequence[int],
+        sims: Sequence[float],
+        lead: Mapping[str, Any] | None = None,
+        high: bool = False,
+    ) -> Dict[str, Any]:
+        """Attributes of the given neighbors plus how much they overlap with ``lead``.
+
+        ``ids`` are rows of the "all" index, or of the "high" index when
+        ``high`` is set. FAISS pads missing results with -1; those are dropped.
+        """
+        ids_arr = np.asarray(ids, dtype=np.int64)
+        sims_arr = np.asarray(sims, dtype=np.float32)
+        keep = ids_arr >= 0
+        ids_arr, sims_arr = ids_arr[keep], sims_arr[keep]
+        rows = np.asarray(self.high_rows[ids_arr]) if high else ids_arr
+
+        customer_ids = [None if c == MISSING_CUSTOMER_ID else c for c in np.asarray(self.customer_id[rows]).tolist()]
+        flags = np.asarray(self.is_high_value[rows])
+        codes = {col: np.asarray(self.codes[col][rows]) for col in self.attr_cols}
+
+        neighbors = []
+        for i, row in enumerate(rows.tolist()):
+            item: Dict[str, Any] = {
+                "row_id": int(row),
+                "customer_id": customer_ids[i],
+                "similarity": float(sims_arr[i]),
+                "is_high_value": bool(flags[i]),
+            }
+            for col in self.attr_cols:
+                item[col] = self.vocabs[col][codes[col][i]]
+            neighbors.append(item)
+
+        overlap: Dict[str, Any] = {"high_value_rate": float(flags.mean()) if len(rows) else 0.0}
+        lead = lead or {}
+        for col in self.attr_cols:
+            values, counts = np.unique(codes[col], return_counts=True)
+            summary: Dict[str, Any] = {
+                "top_value": self.vocabs[col][int(values[counts.argmax()])] if counts.size else None,
+                "match_rate": None,
+            }
+            if col in lead:
+                code = self._vocab_index[col].get("" if lead[col] is None else str(lead[col]))
+                matches = int(counts[values == code].sum()) if code is not None else 0
+                summary["match_rate"] = matches / len(rows) if len(rows) else 0.0
+            overlap[col] = summary
+        return {"neighbors": neighbors, "overlap": overlap}
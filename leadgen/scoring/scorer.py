@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Dict, Tuple
+from typing import Dict, List, Tuple
 
 import numpy as np
 
@@ -17,17 +17,26 @@ def l2_normalize(X: np.ndarray, eps: float = 1e-12) -> np.ndarray:
 
 
 def score_lead(lead_emb: np.ndarray, idx_all, idx_high, k: int = 20) -> Dict[str, float]:
-    s_all, nn_all = idx_all.topk(lead_emb.astype(np.float32), k)
-    s_high, nn_high = idx_high.topk(lead_emb.astype(np.float32), k)
+    return score_leads(lead_emb[:1], idx_all, idx_high, k)[0]
 
-    s_look = float(np.mean(s_high[0])) if s_high.size else 0.0
-    s_novel = 1.0 - float(np.mean(s_all[0])) if s_all.size else 1.0
-    contrast = s_look - (1.0 - s_novel)
-    return {
-        "S_look": s_look,
-        "S_novel": s_novel,
-        "contrast": contrast,
-        "nn_all_ids": nn_all[0].tolist() if nn_all.size else [],
-        "nn_high_ids": nn_high[0].tolist() if nn_high.size else [],
-    }
 
+def score_leads(lead_embs: np.ndarray, idx_all, idx_high, k: int = 20) -> List[Dict]:
+    Q = lead_embs.astype(np.float32)
+    s_all, nn_all = idx_all.topk(Q, k)
+    s_high, nn_high = idx_high.topk(Q, k)
+
+    s_look = s_high.mean(axis=1) if s_high.shape[1] else np.zeros(len(Q))
+    s_novel = 1.0 - s_all.mean(axis=1) if s_all.shape[1] else np.ones(len(Q))
+    contrast = s_look - (1.0 - s_novel)
+    return [
+        {
+            "S_look": float(s_look[i]),
+            "S_novel": float(s_novel[i]),
+            "contrast": float(contrast[i]),
+            "nn_all_ids": nn_all[i].tolist(),
+            "nn_high_ids": nn_high[i].tolist(),
+            "nn_all_scores": s_all[i].tolist(),
+            "nn_high_scores": s_high[i].tolist(),
+        }
+        for i in range(len(Q))
+    ]
@@ -2,10 +2,18 @@ from __future__ import annotations
 
 from typing import Any, Dict
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
 from pydantic import BaseModel
 
 from leadgen.service.bootstrap import Components, embed_one, load_components, score_one, is_duplicate_email
+from leadgen.service.streaming import (
+    ARROW_STREAM_TYPE,
+    NDJSON_TYPES,
+    DuplexStreamingResponse,
+    iter_arrow_frames,
+    iter_ndjson_frames,
+    stream_scores,
+)
 
 
 app = FastAPI()
@@ -46,11 +54,26 @@ def health() -> Dict[str, str]:
 @app.post("/score_lead")
 def score_lead_endpoint(lead: Lead) -> Dict[str, Any]:
     assert components is not None, "Components not loaded"
+    lead_dict = lead.dict()
     # Duplicate check by email (short-circuit)
-    if is_duplicate_email(lead.dict(), getattr(app.state, "crm_emails", set())):
+    if is_duplicate_email(lead_dict, getattr(app.state, "crm_emails", set())):
         return {"is_duplicate": True, "reason": "email_exact_match"}
-    emb = embed_one(lead.dict(), components)
-    scores = score_one(emb, components)
+    emb = embed_one(lead_dict, components)
+    scores = score_one(emb, components, lead_dict)
     scores.update({"is_duplicate": False})
     return scores
 
+
+@app.post("/score_leads/stream")
+async def score_leads_stream_endpoint(request: Request) -> DuplexStreamingResponse:
+    assert components is not None, "Components not loaded"
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in NDJSON_TYPES:
+        frames = iter_ndjson_frames(request.stream())
+    elif content_type == ARROW_STREAM_TYPE:
+        frames = iter_arrow_frames(request.stream())
+    else:
+        raise HTTPException(status_code=415, detail=f"Expected NDJSON or {ARROW_STREAM_TYPE}")
+    arrow_output = ARROW_STREAM_TYPE in request.headers.get("accept", "")
+    body = stream_scores(frames, components, getattr(app.state, "crm_emails", set()), arrow_output)
+    return DuplexStreamingResponse(body, media_type=ARROW_STREAM_TYPE if arrow_output else "application/x-ndjson")
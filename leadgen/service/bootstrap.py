@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import json
+import warnings
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import joblib
 import numpy as np
@@ -12,18 +13,20 @@ from leadgen.config import ARTIFACTS_DIR
 from leadgen.features.normalize import normalize_email
 from leadgen.embeddings.tabular_embedder import TabularEmbedder
 from leadgen.embeddings.text_embedder import TextEmbedder
-from leadgen.features.preprocess import preprocess_dataframe
+from leadgen.features.preprocess import CATEGORICAL_COLS, preprocess_dataframe
 from leadgen.index.faiss_store import FaissIPIndex
-from leadgen.scoring.scorer import l2_normalize, score_lead
+from leadgen.index.neighbor_store import NeighborStore
+from leadgen.scoring.scorer import l2_normalize, score_lead, score_leads
 
 
 class Components:
-    def __init__(self, text_model: TextEmbedder, tabular: TabularEmbedder, idx_all: FaissIPIndex, idx_high: FaissIPIndex, feature_meta: Dict) -> None:
+    def __init__(self, text_model: TextEmbedder, tabular: TabularEmbedder, idx_all: FaissIPIndex, idx_high: FaissIPIndex, feature_meta: Dict, neighbors: Optional[NeighborStore] = None) -> None:
         self.text_model = text_model
         self.tabular = tabular
         self.idx_all = idx_all
         self.idx_high = idx_high
         self.feature_meta = feature_meta
+        self.neighbors = neighbors
 
 
 def load_components() -> Components:
@@ -49,12 +52,38 @@ def load_components() -> Components:
     idx_all.dim = idx_all.index.d
     idx_high.dim = idx_high.index.d
 
-    return Components(text_model, tabular, idx_all, idx_high, feature_meta)
+    # Neighbor metadata sidecar (absent in artifacts built before it existed).
+    # A sidecar that doesn't line up with the indices would attribute neighbors
+    # to the wrong customers, so explanations are disabled rather than served.
+    neighbors = None
+    neighbors_dir = ARTIFACTS_DIR / "neighbors"
+    if (neighbors_dir / "meta.json").exists():
+        try:
+            neighbors = NeighborStore(neighbors_dir)
+        except (OSError, ValueError) as exc:
+            warnings.warn(f"Ignoring neighbor store: {exc}")
+        else:
+            if not neighbors.matches(idx_all.index.ntotal, idx_high.index.ntotal):
+                warnings.warn(
+                    f"Ignoring neighbor store: it has {neighbors.n_rows}/{len(neighbors.high_rows)} rows, "
+                    f"indices have {idx_all.index.ntotal}/{idx_high.index.ntotal}; rebuild artifacts"
+                )
+                neighbors = None
+
+    return Components(text_model, tabular, idx_all, idx_high, feature_meta, neighbors)
 
 
 def embed_one(lead: Dict, components: Components) -> np.ndarray:
-    df = pd.DataFrame([lead])
+    return embed_batch(pd.DataFrame([lead]), components)
+
+
+def embed_batch(df: pd.DataFrame, components: Components) -> np.ndarray:
     text_series, X_tab, _ = preprocess_dataframe(df)
+    # Frequency encoders are fitted on the frame itself, which for a single lead
+    # maps every present category to 1.0. Keep that per row so a lead scores the
+    # same whether it arrives alone or in a batch.
+    for j, col in enumerate(CATEGORICAL_COLS):
+        X_tab[:, j] = df[col].notna().to_numpy(dtype=np.float32) if col in df.columns else 1.0
     E_text = components.text_model.encode(text_series.tolist())
     E_tab = components.tabular.transform(X_tab)
     E = np.concatenate([E_text, E_tab], axis=1)
@@ -62,8 +91,18 @@ def embed_one(lead: Dict, components: Components) -> np.ndarray:
     return E.astype(np.float32)
 
 
-def score_one(emb: np.ndarray, components: Components) -> Dict:
-    return score_lead(emb, components.idx_all, components.idx_high)
+def score_one(emb: np.ndarray, components: Components, lead: Optional[Dict] = None) -> Dict:
+    scores = score_lead(emb, components.idx_all, components.idx_high)
+    if components.neighbors is not None:
+        scores["explanation"] = {
+            "all": components.neighbors.describe(scores["nn_all_ids"], scores["nn_all_scores"], lead),
+            "high": components.neighbors.describe(scores["nn_high_ids"], scores["nn_high_scores"], lead, high=True),
+        }
+    return scores
+
+
+def score_batch(embs: np.ndarray, components: Components) -> List[Dict]:
+    return score_leads(embs, components.idx_all, components.idx_high)
 
 
 def is_duplicate_email(lead: Dict, crm_emails: set[str]) -> bool:
@@ -0,0 +1,359 @@
+from __future__ import annotations
+
+import io
+import json
+import struct
+from typing import AsyncIterator, Dict, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from leadgen.config import STREAM_BATCH_SIZE
+from leadgen.features.normalize import normalize_email
+from leadgen.service.bootstrap import Components, embed_batch, score_batch
+
+
+NDJSON_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+ARROW_STREAM_TYPE = "application/vnd.apache.arrow.stream"
+MAX_LINE_BYTES = 1 << 20
+MAX_ARROW_MESSAGE_BYTES = 64 << 20
+
+# Required fields of the `Lead` model, validated per column instead of per object
+TEXT_FIELDS = ["industry", "country", "job_title", "bio"]
+NUMERIC_FIELDS = ["company_size", "web_activity_score", "email_engagement_score"]
+INTEGER_FIELDS = {"company_size"}
+
+RESULT_SCHEMA = pa.schema([
+    ("row", pa.int64()),
+    ("customer_id", pa.int64()),
+    ("is_duplicate", pa.bool_()),
+    ("reason", pa.string()),
+    ("error", pa.string()),
+    ("S_look", pa.float64()),
+    ("S_novel", pa.float64()),
+    ("contrast", pa.float64()),
+    ("nn_all_ids", pa.list_(pa.int64())),
+    ("nn_high_ids", pa.list_(pa.int64())),
+    ("nn_all_scores", pa.list_(pa.float32())),
+    ("nn_high_scores", pa.list_(pa.float32())),
+])
+
+# A frame is the first input row number plus a chunk of raw input: NDJSON lines
+# or an Arrow table. Frames are decoded in `score_frame`, off the event loop.
+Frame = Tuple[int, Union[List[bytes], pa.Table]]
+
+
+async def iter_ndjson_frames(chunks: AsyncIterator[bytes], batch_size: int = STREAM_BATCH_SIZE) -> AsyncIterator[Frame]:
+    pending = b""
+    lines: List[bytes] = []
+    row = 0
+    async for chunk in chunks:
+        pending += chunk
+        *complete, pending = pending.split(b"\n")
+        if len(pending) > MAX_LINE_BYTES:
+            raise ValueError(f"NDJSON line exceeds {MAX_LINE_BYTES} bytes")
+        for line in complete:
+            if line.strip():
+                lines.append(line)
+            if len(lines) >= batch_size:
+                yield row, lines
+                row += len(lines)
+                lines = []
+    if pending.strip():
+        lines.append(pending)
+    if lines:
+        yield row, lines
+
+
+def parse_ndjson_lines(lines: List[bytes], start_row: int) -> Tuple[pd.DataFrame, Dict[int, str]]:
+    records: List[Dict] = []
+    rows: List[int] = []
+    errors: Dict[int, str] = {}
+    for row, line in enumerate(lines, start_row):
+        try:
+            obj = json.loads(line)
+        except ValueError as exc:
+            errors[row] = f"invalid JSON: {exc}"
+            continue
+        if isinstance(obj, dict):
+            records.append(obj)
+            rows.append(row)
+        else:
+            errors[row] = "expected a JSON object"
+    return pd.DataFrame(records, index=rows), errors
+
+
+def _message_body_length(metadata: bytes) -> int:
+    # bodyLength is field 3 of the flatbuffer `Message` table (Arrow Message.fbs)
+    try:
+        table = struct.unpack_from("<I", metadata, 0)[0]
+        vtable = table - struct.unpack_from("<i", metadata, table)[0]
+        vtable_size = struct.unpack_from("<H", metadata, vtable)[0]
+        if vtable_size < 12:
+            return 0
+        field = struct.unpack_from("<H", metadata, vtable + 10)[0]
+        body_length = struct.unpack_from("<q", metadata, table + field)[0] if field else 0
+    except struct.error:
+        raise ValueError("invalid Arrow IPC message metadata") from None
+    if body_length < 0:
+        raise ValueError("invalid Arrow IPC message metadata")
+    return body_length
+
+
+async def iter_arrow_messages(chunks: AsyncIterator[bytes]) -> AsyncIterator[pa.ipc.Message]:
+    """Split an Arrow IPC stream into messages as the bytes arrive.
+
+    Framing is read from the length prefixes, so only complete messages are
+    handed to pyarrow and nothing blocks waiting for the network.
+    """
+    buf = bytearray()
+    source = chunks.__aiter__()
+
+    async def fill(n: int) -> bool:
+        while len(buf) < n:
+            try:
+                buf.extend(await source.__anext__())
+            except StopAsyncIteration:
+                return False
+        return True
+
+    while await fill(4):
+        prefix = 4
+        length = struct.unpack_from("<i", buf, 0)[0]
+        if length == -1:  # continuation marker, then the real length
+            if not await fill(8):
+                break
+            prefix = 8
+            length = struct.unpack_from("<i", buf, 4)[0]
+        if length == 0:  # end-of-stream marker
+            return
+        if length < 0 or length > MAX_ARROW_MESSAGE_BYTES or not await fill(prefix + length):
+            break
+        total = prefix + length + _message_body_length(bytes(buf[prefix : prefix + length]))
+        if total > MAX_ARROW_MESSAGE_BYTES:
+            raise ValueError(f"Arrow IPC message exceeds {MAX_ARROW_MESSAGE_BYTES} bytes")
+        if not await fill(total):
+            break
+        data = bytes(buf[:total])
+        del buf[:total]
+        yield pa.ipc.read_message(pa.py_buffer(data))
+    if buf:
+        raise ValueError("truncated or invalid Arrow IPC stream")
+
+
+async def iter_arrow_frames(chunks: AsyncIterator[bytes], batch_size: int = STREAM_BATCH_SIZE) -> AsyncIterator[Frame]:
+    messages = iter_arrow_messages(chunks)
+    schema = None
+    pending = None
+    row = 0
+    try:
+        async for message in messages:
+            if schema is None:
+                if message.type != "schema":
+                    raise ValueError("Arrow IPC stream must start with a schema")
+                schema = pa.ipc.read_schema(message)
+                pending = schema.empty_table()
+                continue
+            if message.type != "record batch":
+                raise ValueError(f"unsupported Arrow IPC message: {message.type}")
+            # Client batches are re-chunked to `batch_size` rows: small ones are
+            # coalesced (FAISS search cost is mostly per call), large ones split
+            batch = pa.ipc.read_record_batch(message, schema)
+            pending = pa.concat_tables([pending, pa.Table.from_batches([batch])])
+            while pending.num_rows >= batch_size:
+                yield row, pending.slice(0, batch_size)
+                row += batch_size
+                pending = pending.slice(batch_size)
+        if pending is not None and pending.num_rows:
+            yield row, pending
+    finally:
+        await messages.aclose()
+
+
+def validate_frame(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[int, str]]:
+    """Column-wise equivalent of validating each row as a `Lead`.
+
+    Returns the valid rows with coerced dtypes, and an error message for each
+    invalid row (naming the first bad field).
+    """
+    bad = pd.Series(False, index=df.index)
+    errors: Dict[int, str] = {}
+    clean = pd.DataFrame(index=df.index)
+
+    def reject(mask: pd.Series, field: str) -> None:
+        for row in df.index[mask & ~bad]:
+            errors[int(row)] = f"{field}: field required or invalid"
+        bad[mask] = True
+
+    for col in TEXT_FIELDS:
+        if col not in df.columns:
+            reject(pd.Series(True, index=df.index), col)
+            continue
+        is_str = _is_str(df[col])
+        reject(~is_str, col)
+        clean[col] = df[col].where(is_str, "").astype(str)
+    for col in NUMERIC_FIELDS:
+        if col not in df.columns:
+            reject(pd.Series(True, index=df.index), col)
+            continue
+        values, invalid = _to_number(df[col], integer=col in INTEGER_FIELDS)
+        reject(invalid, col)
+        clean[col] = values.where(~invalid, 0)
+    clean["company_size"] = clean["company_size"].astype(np.int64) if "company_size" in clean else 0
+
+    if "customer_id" in df.columns:
+        ids, invalid = _to_number(df["customer_id"], integer=True)
+        reject(df["customer_id"].notna() & invalid, "customer_id")
+        clean["customer_id"] = ids.where(~invalid).astype("Int64")
+    for col in ["name", "email"]:
+        if col in df.columns:
+            clean[col] = df[col]
+    return clean[~bad], errors
+
+
+def _is_str(series: pd.Series) -> pd.Series:
+    if series.dtype == object:
+        return series.map(lambda v: isinstance(v, str)).astype(bool)
+    if pd.api.types.is_string_dtype(series.dtype):
+        return series.notna()
+    return pd.Series(False, index=series.index)
+
+
+def _to_number(series: pd.Series, integer: bool) -> Tuple[pd.Series, pd.Series]:
+    """Numeric values of ``series`` and a mask of entries that aren't valid numbers.
+
+    Strings are parsed as numbers; bools, containers, values that aren't
+    finite as float32 (the scaler's dtype) and (for ``integer``) fractional
+    or out-of-int64-range values are rejected.
+    """
+    if series.dtype == object:
+        scalar = series.map(lambda v: isinstance(v, (int, float, str)) and not isinstance(v, bool)).astype(bool)
+        series = series.where(scalar)
+    elif pd.api.types.is_bool_dtype(series.dtype):
+        series = pd.Series(np.nan, index=series.index)
+    values = pd.to_numeric(series, errors="coerce").astype(np.float64)
+    with np.errstate(over="ignore"):
+        invalid = values.isna() | ~np.isfinite(values.astype(np.float32))
+    if integer:
+        invalid |= (values != np.trunc(values)) | (values < -(2.0 ** 63)) | (values >= 2.0 ** 63)
+    return values, invalid
+
+
+def load_frame(frame: Frame) -> Tuple[pd.DataFrame, Dict[int, str]]:
+    """DataFrame indexed by input row number, plus errors for rows that could
+    not be decoded at all (e.g. malformed NDJSON lines)."""
+    start_row, payload = frame
+    if isinstance(payload, pa.Table):
+        df = payload.to_pandas()
+        df.index = pd.RangeIndex(start_row, start_row + len(df))
+        return df, {}
+    return parse_ndjson_lines(payload, start_row)
+
+
+def score_frame(frame: Frame, components: Components, crm_emails: set[str]) -> List[Dict]:
+    df, errors = load_frame(frame)
+    clean, invalid = validate_frame(df)
+    errors = {**errors, **invalid}
+    records: Dict[int, Dict] = {row: {"row": row, "error": msg} for row, msg in errors.items()}
+
+    if "email" in clean.columns:
+        norm = clean["email"].fillna("").astype(str).map(normalize_email)
+        # A blank line in the CRM email list must not match leads without an email
+        is_dup = (norm.ne("") & norm.isin(crm_emails)).to_numpy()
+    else:
+        is_dup = np.zeros(len(clean), dtype=bool)
+    customer_ids = np.asarray(clean["customer_id"].tolist() if "customer_id" in clean.columns else [None] * len(clean), dtype=object)
+    for row, cid in zip(clean.index[is_dup], customer_ids[is_dup]):
+        records[int(row)] = {"row": int(row), "customer_id": _opt_int(cid), "is_duplicate": True, "reason": "email_exact_match"}
+
+    to_score = clean[~is_dup]
+    if len(to_score):
+        scores = score_batch(embed_batch(to_score, components), components)
+        for row, cid, s in zip(to_score.index, customer_ids[~is_dup], scores):
+            records[int(row)] = {"row": int(row), "customer_id": _opt_int(cid), **s, "is_duplicate": False}
+    return [records[row] for row in sorted(records)]
+
+
+def _opt_int(value) -> int | None:
+    return None if value is None or pd.isna(value) else int(value)
+
+
+class _ArrowEncoder:
+    def __init__(self) -> None:
+        self._sink = io.BytesIO()
+        self._writer = pa.ipc.new_stream(self._sink, RESULT_SCHEMA)
+
+    def _drain(self) -> bytes:
+        data = self._sink.getvalue()
+        self._sink.seek(0)
+        self._sink.truncate()
+        return data
+
+    def encode(self, records: List[Dict]) -> bytes:
+        self._writer.write_batch(pa.RecordBatch.from_pylist(records, schema=RESULT_SCHEMA))
+        return self._drain()
+
+    def close(self) -> bytes:
+        self._writer.close()
+        return self._drain()
+
+
+class _NdjsonEncoder:
+    def encode(self, records: List[Dict]) -> bytes:
+        return "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records).encode("utf-8")
+
+    def close(self) -> bytes:
+        return b""
+
+
+async def stream_scores(
+    frames: AsyncIterator[Frame],
+    components: Components,
+    crm_emails: set[str],
+    arrow_output: bool = False,
+) -> AsyncIterator[bytes]:
+    """Score frames as they arrive and yield encoded results.
+
+    The request body is only read when the next frame is needed, and the next
+    frame only when the client has taken the previous output, so memory per
+    connection is about one frame plus one IPC message or NDJSON line. Only
+    decoding and scoring use the threadpool; waiting on the network never does.
+    Errors after the response has started are reported as a final record with
+    ``error`` set; a client disconnect just ends the stream.
+    """
+    encoder = _ArrowEncoder() if arrow_output else _NdjsonEncoder()
+    try:
+        async for frame in frames:
+            records = await run_in_threadpool(score_frame, frame, components, crm_emails)
+            yield await run_in_threadpool(encoder.encode, records)
+    except ClientDisconnect:
+        return
+    except (ValueError, OSError, pa.ArrowException) as exc:
+        yield encoder.encode([{"error": f"stream aborted: {exc}"}])
+    finally:
+        await frames.aclose()
+    yield encoder.close()
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """StreamingResponse whose body keeps reading the request while it is sent.
+
+    Under ASGI spec < 2.4 the stock response listens for disconnects on
+    ``receive`` and would swallow the request body; there the body iterator owns
+    ``receive`` and sees the disconnect itself (``request.stream()`` raises
+    ``ClientDisconnect``). Newer servers take the stock path.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        spec_version = tuple(map(int, scope.get("asgi", {}).get("spec_version", "2.0").split(".")))
+        if scope["type"] != "http" or spec_version >= (2, 4):
+            await super().__call__(scope, receive, send)
+            return
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
@@ -9,12 +9,14 @@ import joblib
 import numpy as np
 import pandas as pd
 
-from leadgen.config import ARTIFACTS_DIR, DATA_DIR, TOPK_DEFAULT
+from leadgen.config import ARTIFACTS_DIR, DATA_DIR, TEXT_EMBEDDING_STORE_DIR, TOPK_DEFAULT
 from leadgen.features.normalize import normalize_email
+from leadgen.embeddings.embedding_store import TextEmbeddingStore
 from leadgen.embeddings.tabular_embedder import TabularEmbedder
 from leadgen.embeddings.text_embedder import TextEmbedder
 from leadgen.features.preprocess import preprocess_dataframe
 from leadgen.index.faiss_store import FaissIPIndex
+from leadgen.index.neighbor_store import write_neighbor_store
 from leadgen.scoring.scorer import l2_normalize
 
 
@@ -24,12 +26,14 @@ def main() -> None:
     parser.add_argument("--text-cols", default=",".join(["job_title","bio"]), help="Comma-separated text columns")
     parser.add_argument("--cat-cols", default=",".join(["industry","country"]), help="Comma-separated categorical columns")
     parser.add_argument("--num-cols", default=",".join(["company_size","web_activity_score","email_engagement_score"]), help="Comma-separated numeric columns")
+    parser.add_argument("--embedding-store", default=str(TEXT_EMBEDDING_STORE_DIR), help="Directory of the on-disk text embedding store (empty string disables it)")
     args = parser.parse_args()
 
     input_path = os.environ.get("LEADGEN_INPUT_PATH", args.input_path)
     text_cols = os.environ.get("LEADGEN_TEXT_COLS", args.text_cols).split(",") if os.environ.get("LEADGEN_TEXT_COLS", args.text_cols) else []
     cat_cols = os.environ.get("LEADGEN_CAT_COLS", args.cat_cols).split(",") if os.environ.get("LEADGEN_CAT_COLS", args.cat_cols) else []
     num_cols = os.environ.get("LEADGEN_NUM_COLS", args.num_cols).split(",") if os.environ.get("LEADGEN_NUM_COLS", args.num_cols) else []
+    store_dir = os.environ.get("LEADGEN_EMBEDDING_STORE", args.embedding_store)
     ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
     (ARTIFACTS_DIR / "text_model").mkdir(parents=True, exist_ok=True)
     (ARTIFACTS_DIR / "tabular").mkdir(parents=True, exist_ok=True)
@@ -43,7 +47,19 @@ def main() -> None:
     text_series, X_tab, encoders = preprocess_dataframe(crm, text_cols=text_cols, categorical_cols=cat_cols, numeric_cols=num_cols)
 
     text_model = TextEmbedder()
-    E_text = text_model.encode(text_series.tolist())
+    if store_dir:
+        # Only blobs never seen before (for this model) go through the encoder
+        store = TextEmbeddingStore(Path(store_dir), text_model.model_id)
+        E_text, stats = store.encode(text_series.tolist(), text_model)
+        dedup = 1.0 - stats["unique"] / max(stats["rows"], 1)
+        hit_rate = stats["cached"] / max(stats["unique"], 1)
+        print(
+            f"text embeddings: {stats['rows']} rows, {stats['unique']} unique blobs (dedup {dedup:.1%}), "
+            f"{stats['cached']} from store (hit rate {hit_rate:.1%}), {stats['encoded']} encoded "
+            f"(store: {store.dir}, {len(store)} entries)"
+        )
+    else:
+        E_text = text_model.encode(text_series.tolist())
 
     tabular = TabularEmbedder()
     tabular.fit(X_tab)
@@ -66,12 +82,17 @@ def main() -> None:
     joblib.dump(tabular.scaler, ARTIFACTS_DIR / "tabular" / "scaler.pkl")
     joblib.dump(tabular.pca, ARTIFACTS_DIR / "tabular" / "pca.pkl")
 
-    # Save FAISS indices
+    # Save FAISS indices. Drop the old neighbor sidecar first so a crash before
+    # it is rewritten leaves no sidecar rather than one describing old indices.
+    (ARTIFACTS_DIR / "neighbors" / "meta.json").unlink(missing_ok=True)
     import faiss  # type: ignore
 
     faiss.write_index(idx_all.index, str(ARTIFACTS_DIR / "faiss" / "all.index"))
     faiss.write_index(idx_high.index, str(ARTIFACTS_DIR / "faiss" / "high.index"))
 
+    # Neighbor metadata aligned with index row IDs, for explanations at serve time
+    write_neighbor_store(crm, high_mask, ARTIFACTS_DIR / "neighbors")
+
     feature_meta = {
         "embedding_dim": int(dim),
         "encoders": {k: list(v.keys()) for k, v in encoders.items()},
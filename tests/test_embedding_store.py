@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import numpy as np
+
+from leadgen.embeddings.embedding_store import TextEmbeddingStore, model_fingerprint
+
+
+class CountingModel:
+    model_id = "fake-model"
+
+    def __init__(self) -> None:
+        self.seen: list[str] = []
+
+    def encode(self, texts):
+        texts = list(texts)
+        self.seen.extend(texts)
+        return np.array([[len(t), t.count("a"), 1.0] for t in texts], dtype=np.float32)
+
+
+def test_store_dedups_and_reuses_across_builds(tmp_path):
+    model = CountingModel()
+    texts = ["alpha", "beta", "alpha", "gamma", "beta"]
+
+    E, stats = TextEmbeddingStore(tmp_path, model.model_id).encode(texts, model)
+    assert stats == {"rows": 5, "unique": 3, "cached": 0, "encoded": 3}
+    assert sorted(model.seen) == ["alpha", "beta", "gamma"]
+    np.testing.assert_array_equal(E, model.encode(texts))
+
+    # A fresh store instance reads back from disk and only encodes new blobs
+    model.seen.clear()
+    store = TextEmbeddingStore(tmp_path, model.model_id)
+    E2, stats2 = store.encode(["gamma", "delta", "alpha"], model)
+    assert model.seen == ["delta"]
+    assert stats2 == {"rows": 3, "unique": 3, "cached": 2, "encoded": 1}
+    assert len(store) == 4
+    np.testing.assert_array_equal(E2, model.encode(["gamma", "delta", "alpha"]))
+
+
+def test_store_is_keyed_by_model_id(tmp_path):
+    model = CountingModel()
+    TextEmbeddingStore(tmp_path, "model-a").encode(["alpha"], model)
+    other = TextEmbeddingStore(tmp_path, "model-b")
+    assert len(other) == 0
+
+
+def test_stale_instances_do_not_overwrite_each_other(tmp_path):
+    model = CountingModel()
+    first = TextEmbeddingStore(tmp_path, model.model_id)
+    second = TextEmbeddingStore(tmp_path, model.model_id)
+
+    first.encode(["alpha", "beta"], model)
+    # `second` was opened before those rows existed; it must append after them
+    E, stats = second.encode(["beta", "gamma"], model)
+    assert stats["cached"] == 1 and stats["encoded"] == 1
+
+    reopened = TextEmbeddingStore(tmp_path, model.model_id)
+    assert len(reopened) == 3
+    E_all, _ = reopened.encode(["alpha", "beta", "gamma"], model)
+    np.testing.assert_array_equal(E_all, model.encode(["alpha", "beta", "gamma"]))
+
+
+def test_model_fingerprint_tracks_weights(tmp_path):
+    (tmp_path / "config.json").write_text("{}")
+    (tmp_path / "weights.bin").write_bytes(b"\x00" * 8)
+    before = model_fingerprint(tmp_path)
+    assert model_fingerprint(tmp_path) == before
+
+    (tmp_path / "weights.bin").write_bytes(b"\x01" * 8)
+    assert model_fingerprint(tmp_path) != before
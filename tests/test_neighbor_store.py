@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from leadgen.index.neighbor_store import NeighborStore, write_neighbor_store
+
+
+def _crm() -> pd.DataFrame:
+    return pd.DataFrame({
+        "customer_id": [100, 101, 102, 103],
+        "industry": ["Finance", "SaaS", "Finance", None],
+        "job_title": ["Portfolio Manager", "DevOps Engineer", "Quant Researcher", "Data Scientist"],
+        "country": ["US", "UK", "US", "DE"],
+    })
+
+
+def test_describe_all_index_neighbors(tmp_path):
+    high_mask = np.array([True, False, True, False])
+    write_neighbor_store(_crm(), high_mask, tmp_path)
+    store = NeighborStore(tmp_path)
+
+    out = store.describe([2, 0, 1, -1], [0.9, 0.8, 0.1, -1.0], {"industry": "Finance", "country": "FR"})
+    assert [n["customer_id"] for n in out["neighbors"]] == [102, 100, 101]
+    assert out["neighbors"][0] == {
+        "row_id": 2,
+        "customer_id": 102,
+        "similarity": np.float32(0.9).item(),
+        "is_high_value": True,
+        "industry": "Finance",
+        "job_title": "Quant Researcher",
+        "country": "US",
+    }
+    assert out["overlap"]["industry"] == {"top_value": "Finance", "match_rate": 2 / 3}
+    assert out["overlap"]["country"]["match_rate"] == 0.0
+    assert out["overlap"]["job_title"]["match_rate"] is None
+    assert abs(out["overlap"]["high_value_rate"] - 2 / 3) < 1e-6
+
+
+def test_describe_maps_high_index_rows(tmp_path):
+    write_neighbor_store(_crm(), np.array([False, True, False, True]), tmp_path)
+    store = NeighborStore(tmp_path)
+
+    out = store.describe([1, 0], [0.7, 0.6], high=True)
+    assert [n["customer_id"] for n in out["neighbors"]] == [103, 101]
+    assert out["neighbors"][0]["industry"] == ""
+    assert out["overlap"]["high_value_rate"] == 1.0
+
+
+def test_null_customer_ids_and_size_checks(tmp_path):
+    crm = _crm()
+    crm.loc[1, "customer_id"] = None
+    write_neighbor_store(crm, np.array([True, False, True, False]), tmp_path)
+    store = NeighborStore(tmp_path)
+
+    out = store.describe([1, 0], [0.5, 0.4])
+    assert [n["customer_id"] for n in out["neighbors"]] == [None, 100]
+    assert store.matches(4, 2)
+    assert not store.matches(5, 2) and not store.matches(4, 3)
+
+
+def test_customer_ids_stay_exact_or_fail_loudly(tmp_path):
+    crm = _crm()
+    big = 2**62 + 1
+    crm["customer_id"] = pd.array([big, None, 7, 8], dtype="Int64")
+    write_neighbor_store(crm, np.array([True, False, False, False]), tmp_path)
+    out = NeighborStore(tmp_path).describe([0, 1], [0.5, 0.4])
+    assert [n["customer_id"] for n in out["neighbors"]] == [big, None]
+
+    crm["customer_id"] = ["C-1", "C-2", "C-3", "C-4"]
+    with pytest.raises(ValueError, match="customer_id"):
+        write_neighbor_store(crm, np.array([True, False, False, False]), tmp_path / "bad")
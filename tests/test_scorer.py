@@ -3,7 +3,7 @@ from __future__ import annotations
 import numpy as np
 
 from leadgen.index.faiss_store import FaissIPIndex
-from leadgen.scoring.scorer import l2_normalize, score_lead
+from leadgen.scoring.scorer import l2_normalize, score_lead, score_leads
 
 
 def test_score_lead_math():
@@ -30,3 +30,18 @@ def test_score_lead_math():
     assert 0.0 <= scores["S_novel"] <= 1.0
     assert isinstance(scores["contrast"], float)
 
+
+def test_score_leads_matches_single_lead_scoring():
+    base = l2_normalize(np.random.RandomState(0).rand(50, 4).astype(np.float32))
+    idx_all = FaissIPIndex(4)
+    idx_all.add(base)
+    idx_high = FaissIPIndex(4)
+    idx_high.add(base[:20])
+
+    Q = l2_normalize(np.random.RandomState(1).rand(5, 4).astype(np.float32))
+    batch = score_leads(Q, idx_all, idx_high, k=5)
+    assert len(batch) == 5
+    for i, scores in enumerate(batch):
+        single = score_lead(Q[i : i + 1], idx_all, idx_high, k=5)
+        assert scores["nn_all_ids"] == single["nn_all_ids"]
+        assert abs(scores["S_look"] - single["S_look"]) < 1e-6
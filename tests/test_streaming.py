@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import json
+
+import pandas as pd
+import pyarrow as pa
+
+import leadgen.service.app as app_module
+import leadgen.service.streaming as streaming_module
+from leadgen.service.streaming import (
+    iter_arrow_frames,
+    iter_ndjson_frames,
+    load_frame,
+    score_frame,
+    stream_scores,
+    validate_frame,
+)
+
+
+LEAD = {
+    "industry": "Finance",
+    "company_size": 500,
+    "country": "US",
+    "job_title": "Portfolio Manager",
+    "bio": "builds trading strategies",
+    "web_activity_score": 0.8,
+    "email_engagement_score": 0.7,
+}
+
+
+async def _chunks(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i : i + size]
+
+
+async def _collect(frames):
+    return [frame async for frame in frames]
+
+
+def _arrow_stream(table: pa.Table, max_chunksize: int) -> bytes:
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=max_chunksize):
+            writer.write_batch(batch)
+    return sink.getvalue()
+
+
+def test_ndjson_frames_split_lines_across_chunks():
+    body = "\n".join([json.dumps(LEAD), "{oops", "", json.dumps({**LEAD, "customer_id": 3}), "[1]"]).encode()
+    frames = asyncio.run(_collect(iter_ndjson_frames(_chunks(body, 7), batch_size=2)))
+    assert [(start, len(lines)) for start, lines in frames] == [(0, 2), (2, 2)]
+
+    df, errors = load_frame(frames[1])
+    assert list(df.index) == [2]
+    assert df.loc[2, "customer_id"] == 3
+    assert errors == {3: "expected a JSON object"}
+    assert list(load_frame(frames[0])[1]) == [1]
+
+
+def test_arrow_frames_are_rechunked_to_batch_size():
+    table = pa.Table.from_pylist([{**LEAD, "customer_id": i} for i in range(7)])
+    frames = asyncio.run(_collect(iter_arrow_frames(_chunks(_arrow_stream(table, 2), 64), batch_size=3)))
+    dfs = [load_frame(frame)[0] for frame in frames]
+    assert [list(df.index) for df in dfs] == [[0, 1, 2], [3, 4, 5], [6]]
+    assert dfs[2]["customer_id"].tolist() == [6]
+
+
+def test_truncated_arrow_stream_reports_error_record():
+    table = pa.Table.from_pylist([LEAD] * 100)
+    data = _arrow_stream(table, 100)
+
+    async def run():
+        frames = iter_arrow_frames(_chunks(data[: len(data) - 100], 64))
+        return b"".join([chunk async for chunk in stream_scores(frames, None, set())])
+
+    out = [json.loads(line) for line in asyncio.run(run()).splitlines()]
+    assert len(out) == 1 and out[0]["error"].startswith("stream aborted")
+
+
+def test_validate_frame_reports_first_bad_field():
+    df = pd.DataFrame(
+        [
+            LEAD,
+            {**LEAD, "bio": None},
+            {**LEAD, "company_size": "lots"},
+            {**LEAD, "company_size": "12"},
+            {**LEAD, "company_size": 12.9},
+            {**LEAD, "company_size": 1e30},
+            {**LEAD, "industry": 123},
+            {**LEAD, "industry": {"a": 1}},
+            {**LEAD, "industry": ["a", "b"]},
+            {**LEAD, "customer_id": 3.7},
+            {**LEAD, "customer_id": 4},
+            {**LEAD, "web_activity_score": float("inf")},
+            {**LEAD, "web_activity_score": 1e39},
+            {**LEAD, "email_engagement_score": "Infinity"},
+        ],
+        index=range(10, 24),
+    )
+    clean, errors = validate_frame(df)
+    assert list(clean.index) == [10, 13, 20]
+    assert clean.loc[13, "company_size"] == 12
+    assert clean.loc[20, "customer_id"] == 4
+    assert errors == {
+        11: "bio: field required or invalid",
+        12: "company_size: field required or invalid",
+        14: "company_size: field required or invalid",
+        15: "company_size: field required or invalid",
+        16: "industry: field required or invalid",
+        17: "industry: field required or invalid",
+        18: "industry: field required or invalid",
+        19: "customer_id: field required or invalid",
+        21: "web_activity_score: field required or invalid",
+        22: "web_activity_score: field required or invalid",
+        23: "email_engagement_score: field required or invalid",
+    }
+
+    _, errors = validate_frame(df.drop(columns=["country"]))
+    assert set(errors) == set(range(10, 24))
+    assert errors[11] == "country: field required or invalid"
+
+
+def test_score_frame_flags_duplicates_and_echoes_customer_ids(monkeypatch):
+    monkeypatch.setattr(streaming_module, "embed_batch", lambda df, components: df.index.to_numpy())
+    monkeypatch.setattr(streaming_module, "score_batch", lambda embs, components: [{"contrast": float(e)} for e in embs])
+    lines = [
+        json.dumps({**LEAD, "email": " Known@Example.com", "customer_id": 1}).encode(),
+        json.dumps({**LEAD, "customer_id": 2}).encode(),
+        json.dumps({**LEAD, "email": None, "customer_id": 3}).encode(),
+        json.dumps({**LEAD, "email": "new@example.com"}).encode(),
+        json.dumps({**LEAD, "bio": None, "customer_id": 5}).encode(),
+    ]
+
+    out = score_frame((10, lines), None, {"known@example.com", ""})
+    assert out == [
+        {"row": 10, "customer_id": 1, "is_duplicate": True, "reason": "email_exact_match"},
+        {"row": 11, "customer_id": 2, "contrast": 11.0, "is_duplicate": False},
+        {"row": 12, "customer_id": 3, "contrast": 12.0, "is_duplicate": False},
+        {"row": 13, "customer_id": None, "contrast": 13.0, "is_duplicate": False},
+        {"row": 14, "error": "bio: field required or invalid"},
+    ]
+
+
+def test_stalled_arrow_uploads_do_not_starve_other_requests(monkeypatch):
+    monkeypatch.setattr(app_module, "components", object())
+    prefix = _arrow_stream(pa.Table.from_pylist([LEAD] * 10), 10)[:100]
+
+    async def call(path, method, headers, receive):
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"}, "http_version": "1.1",
+            "method": method, "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+            "root_path": "", "headers": headers, "client": ("test", 1), "server": ("test", 80),
+        }
+        await app_module.app(scope, receive, send)
+        return messages
+
+    async def run():
+        disconnected = asyncio.Event()
+
+        def make_receive():
+            # Sends the first 100 bytes of an Arrow stream, then stalls until disconnect
+            sent = []
+
+            async def receive():
+                if not sent:
+                    sent.append(True)
+                    return {"type": "http.request", "body": prefix, "more_body": True}
+                await disconnected.wait()
+                return {"type": "http.disconnect"}
+
+            return receive
+
+        headers = [(b"content-type", b"application/vnd.apache.arrow.stream")]
+        uploads = [asyncio.ensure_future(call("/score_leads/stream", "POST", headers, make_receive())) for _ in range(60)]
+        await asyncio.sleep(0.2)
+
+        async def empty_receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        health = await asyncio.wait_for(call("/health", "GET", [], empty_receive), timeout=10)
+        assert health[0]["status"] == 200
+
+        disconnected.set()
+        await asyncio.wait_for(asyncio.gather(*uploads), timeout=10)
+
+    asyncio.run(run())